@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Tests for the nginx log parser.
+
+Run with: python -m unittest
+"""
+
+import contextlib
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import unittest
+from operator import attrgetter
+from unittest import mock
+
+import nginx_log_parser
+from nginx_log_parser import NginxLogParser
+
+
+class RegexOnlyParser(NginxLogParser):
+    """Parser that sends every line through the regex pattern."""
+
+    def split_fields(self, line):
+        return None
+
+
+class SplitFieldsTest(unittest.TestCase):
+    """split_fields is a shortcut and must parse every line exactly like the regex."""
+
+    log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nginx.log')
+
+    # Characters the mutations insert: every kind of separator the pattern
+    # knows about, plus ordinary text
+    alphabet = ' \t\n\r\x0b\x0c"[]-:/.' + 'aZ09' + '\xe9\xa0'
+
+    def setUp(self):
+        with open(self.log_file, encoding=NginxLogParser.log_encoding) as f:
+            self.lines = [line.rstrip('\n') for line in f if line.strip()]
+        # Standard combined format lines, cut before the extended fields
+        self.lines += [line[:line.rindex('"') + 1] for line in self.lines]
+
+    def mutate(self, rng, line):
+        chars = list(line)
+        for _ in range(rng.randint(1, 3)):
+            pos = rng.randrange(len(chars) + 1)
+            action = rng.random()
+            if action < 0.5:
+                chars.insert(pos, rng.choice(self.alphabet))
+            elif action < 0.75 and pos < len(chars):
+                chars[pos] = rng.choice(self.alphabet)
+            elif pos < len(chars):
+                del chars[pos]
+        return ''.join(chars)
+
+    def assertSameRecord(self, line):
+        self.assertEqual(NginxLogParser().parse_line(line),
+                         RegexOnlyParser().parse_line(line), repr(line))
+
+    def test_unmodified_lines(self):
+        for line in self.lines:
+            self.assertIsNotNone(NginxLogParser().split_fields(line), line)
+            self.assertSameRecord(line)
+
+    def test_mutated_lines(self):
+        rng = random.Random(0)
+        for _ in range(50000):
+            self.assertSameRecord(self.mutate(rng, rng.choice(self.lines)))
+
+    def test_separators_inside_fields(self):
+        line = self.lines[0]
+        for char in NginxLogParser.whitespace:
+            self.assertSameRecord(line.replace('c8e584ae', 'c' + char + '8e584ae') + ' trailing')
+            self.assertSameRecord(line.replace(' 200 ', ' 200' + char + ' '))
+
+
+class RequestLineTest(unittest.TestCase):
+    """The request line splits like str.split() on the decoded UTF-8 text."""
+
+    line = ('162.55.33.98 - - [26/Apr/2021:21:20:17 +0000] "{request}" 200 2 '
+            '"-" "curl/7.68.0"')
+
+    def parse(self, request):
+        parser = NginxLogParser()
+        record = parser.parse_line(parser.to_log_text(self.line.format(request=request)))
+        return tuple(value.encode(parser.log_encoding).decode('utf-8')
+                     for value in (record.method, record.url, record.protocol))
+
+    def test_ascii_request(self):
+        self.assertEqual(self.parse('GET /api?a=1 HTTP/1.1'), ('GET', '/api?a=1', 'HTTP/1.1'))
+        self.assertEqual(self.parse('GET  /api\tHTTP/1.1'), ('GET', '/api', 'HTTP/1.1'))
+        self.assertEqual(self.parse('GET /a\x1cb HTTP/1.1'), ('GET', '/a', 'b'))
+        self.assertEqual(self.parse('GET'), ('GET', '', ''))
+
+    def test_continuation_bytes_are_not_whitespace(self):
+        # \u00e0 is C3 A0, \u0420 is D0 A0 and \u0445 is D1 85; A0 and 85
+        # are whitespace to str.split() on latin-1 text
+        for url in ('/\u00e0', '/\u0420', '/\u0445', '/caf\u00e0/\u0420\u0445'):
+            self.assertEqual(self.parse(f'GET {url} HTTP/1.1'), ('GET', url, 'HTTP/1.1'))
+        self.assertEqual(self.parse('GET /\u00e0\t/\u0445 HTTP/1.1'), ('GET', '/\u00e0', '/\u0445'))
+
+
+class FilterTest(unittest.TestCase):
+    """URL filters match case-insensitively, as str.lower() on the decoded text."""
+
+    line = ('162.55.33.98 - - [26/Apr/2021:21:20:17 +0000] "GET {url} HTTP/2.0" 200 2 '
+            '"-" "curl/7.68.0"')
+
+    def parse(self, url, url_filter):
+        parser = NginxLogParser()
+        parser.set_filters({'url': url_filter})
+        line = parser.to_log_text(self.line.format(url=url))
+        record = parser.parse_line(line)
+        matched = list(parser.filter_logs([RegexOnlyParser().parse_line(line)], {'url': url_filter}))
+        self.assertEqual(record is not None, bool(matched))
+        return record is not None
+
+    def test_ascii_filter(self):
+        self.assertTrue(self.parse('/API/Annotations', 'api/annotations'))
+        self.assertTrue(self.parse('/\u00c9lan/API', 'api'))
+        self.assertFalse(self.parse('/api', 'apis'))
+
+    def test_non_ascii_filter(self):
+        self.assertTrue(self.parse('/API/\u00c9lan', '\u00e9'))
+        self.assertTrue(self.parse('/API/\u00e9lan', '\u00c9LAN'))
+        self.assertTrue(self.parse('/\u0416\u0443\u0440\u043d\u0430\u043b', '\u0436\u0443\u0440'))
+        self.assertTrue(self.parse('/caf\u00e0/\u0420\u0445', '\u00e0'))
+        self.assertTrue(self.parse('/caf\u00c0', '\u00e0'))
+        # Lowercasing the bytes of \u00c9 (C3 89) gives E3 89, the start of
+        # \u3240 (E3 89 80)
+        self.assertFalse(self.parse('/\u3240', '\u00c9'))
+
+
+class ParallelParseTest(unittest.TestCase):
+    """Parsing byte ranges in worker processes gives the same result as one pass."""
+
+    log_file = SplitFieldsTest.log_file
+
+    def setUp(self):
+        with open(self.log_file, 'rb') as f:
+            lines = [line.rstrip(b'\n') for line in f if line.strip()]
+        rng = random.Random(0)
+        data = []
+        for i in range(2000):
+            line = rng.choice(lines) if i % 50 else b'garbage line ' + str(i).encode()
+            data.append(line + (b'\r\n' if i % 3 == 0 else b'\n'))
+        self.out_of_order = self.write_log(b''.join(data))
+        data.sort(key=lambda line: line.split(b'[', 1)[-1])
+        self.in_order = self.write_log(b''.join(data))
+        
+        # Later lines up to the end of the first 4096-byte range, then the
+        # rest in order: only the boundary between the ranges is out of order
+        early, late = data[:1000], data[1000:]
+        first_range = 0
+        while sum(map(len, late[:first_range])) <= 4096:
+            first_range += 1
+        self.out_of_order_at_boundary = self.write_log(
+            b''.join(late[:first_range] + early + late[first_range:]))
+
+    def write_log(self, data):
+        f = tempfile.NamedTemporaryFile(suffix='.log', delete=False)
+        self.addCleanup(os.remove, f.name)
+        with f:
+            f.write(data)
+        return f.name
+
+    def parse(self, file_path, filters, workers):
+        parser = NginxLogParser()
+        parser.parallel_chunk_size = 4096
+        parser.set_filters(filters)
+        records = list(parser.parse_log_file(file_path, workers))
+        return records, (parser.parsed_lines, parser.unparsed_lines, parser.unparsed_samples,
+                         parser.sorted_by_timestamp)
+
+    def test_same_as_serial(self):
+        for file_path, in_order in ((self.out_of_order, False), (self.in_order, True),
+                                    (self.out_of_order_at_boundary, False)):
+            for filters in ({}, {'status': '200', 'url': 'API/datasources'}):
+                serial = self.parse(file_path, filters, 1)
+                self.assertEqual(self.parse(file_path, filters, 3), serial)
+                self.assertTrue(serial[0])
+                self.assertEqual(serial[1][3], in_order)
+
+
+class SortTest(unittest.TestCase):
+    """main writes the page of sorted(records) whether it sorts, selects or skips sorting."""
+
+    line = ('10.0.0.{addr} - - [26/Apr/2021:21:{minute:02d}:{second:02d} +0000] '
+            '"GET /api/{i} HTTP/1.1" 200 2 "-" "curl/7.68.0" 69 {request_time} '
+            '[upstream] [] 10.0.0.1:80 2 0.004 200 id{i}\n')
+
+    # Larger than partial_sort_limit, so a page can end beyond it
+    record_count = 1500
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        rng = random.Random(0)
+        # Three records per second, so timestamps tie
+        lines = [self.line.format(addr=i % 7, minute=i // 180, second=i // 3 % 60, i=i,
+                                  request_time=f'0.{rng.randrange(50):03d}')
+                 for i in range(self.record_count)]
+        self.in_order = self.write_log('in_order.log', lines)
+        rng.shuffle(lines)
+        self.out_of_order = self.write_log('out_of_order.log', lines)
+
+    def write_log(self, name, lines):
+        file_path = os.path.join(self.directory.name, name)
+        with open(file_path, 'w') as f:
+            f.writelines(lines)
+        return file_path
+
+    def run_main(self, file_path, *args):
+        argv = ['nginx_log_parser.py', file_path, '--no-git', '--workers', '1',
+                '--repo-path', self.directory.name, *args]
+        sort_logs = mock.patch.object(NginxLogParser, 'sort_logs', autospec=True,
+                                      side_effect=NginxLogParser.sort_logs)
+        with mock.patch.object(sys, 'argv', argv), sort_logs as sort_logs, \
+                contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            nginx_log_parser.main()
+        with open(os.path.join(self.directory.name, 'nginx_logs.csv'), newline='') as f:
+            rows = list(csv.reader(f))[1:]
+        return rows, sort_logs.called
+
+    def expected(self, file_path, sort_by, reverse, start, end):
+        records = list(NginxLogParser().parse_log_file(file_path))
+        return [list(record) for record in sorted(records, key=attrgetter(sort_by), reverse=reverse)[start:end]]
+
+    def test_pages_match_sorted(self):
+        pages = [(1, 0), (3, 10), (2, 600), (3, 600)]
+        for file_path in (self.in_order, self.out_of_order):
+            for sort_by in ('timestamp', 'request_time'):
+                for reverse in (False, True):
+                    for page, per_page in pages:
+                        args = ['--sort-by', sort_by, '--page', str(page), '--per-page', str(per_page)]
+                        if reverse:
+                            args.append('--reverse')
+                        start, end = ((page - 1) * per_page, page * per_page) if per_page else (0, None)
+                        with self.subTest(file_path=file_path, args=args):
+                            rows, _ = self.run_main(file_path, *args)
+                            self.assertEqual(rows, self.expected(file_path, sort_by, reverse, start, end))
+
+    def test_skips_sort_of_records_in_timestamp_order(self):
+        self.assertFalse(self.run_main(self.in_order)[1])
+        self.assertFalse(self.run_main(self.in_order, '--page', '2', '--per-page', '600')[1])
+        self.assertTrue(self.run_main(self.in_order, '--reverse')[1])
+        self.assertTrue(self.run_main(self.out_of_order)[1])
+
+
+if __name__ == '__main__':
+    unittest.main()